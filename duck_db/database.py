@@ -1,9 +1,28 @@
 import duckdb
 import logging
 import os
+import tempfile
+import threading
+from contextlib import contextmanager
 
 log = logging.getLogger(__name__)
 
+# Connection settings tuned for a small, write-heavy scraper workload: few threads for tiny
+# inserts, a bounded memory footprint and fewer checkpoints. Each one can be overridden with an env var.
+DUCKDB_CONFIG = {
+    'threads': os.getenv('DUCKDB_THREADS', '2'),
+    'memory_limit': os.getenv('DUCKDB_MEMORY_LIMIT', '1GB'),
+    'checkpoint_threshold': os.getenv('DUCKDB_CHECKPOINT_THRESHOLD', '64MB'),
+    'temp_directory': os.getenv('DUCKDB_TEMP_DIRECTORY', os.path.join(tempfile.gettempdir(), 'duckdb_tmp')),
+}
+
+# Number of reviews sent to DuckDB per INSERT statement.
+REVIEW_BATCH_SIZE = 500
+# Product fields, in the order they are bound into the upsert (after the URL).
+PRODUCT_COLUMNS = ('title', 'brand', 'price', 'ratings', 'reviews_count', 'description')
+# Review fields, in the order they are bound into the bulk insert.
+REVIEW_COLUMNS = ('reviewer_name', 'rating', 'review_title', 'review_body', 'date_of_review', 'verified_buyer')
+
 
 class Database:
     """Handles all database operations for the scraper."""
@@ -15,24 +34,52 @@ class Database:
             db_dir = os.path.dirname(db_path)
             os.makedirs(db_dir, exist_ok=True)
 
-            self.connection = duckdb.connect(db_path)
-            self.cursor = self.connection.cursor()
+            self.connection = duckdb.connect(db_path, config=DUCKDB_CONFIG)
+            # Cursors are handed out per thread, see the `cursor` property below.
+            self._local = threading.local()
+            self._cursors = []
+            self._cursors_lock = threading.Lock()
             self.create_tables()
             log.info(f"Successfully connected to database: {db_path}")
         except Exception as e:
             log.critical("Failed to connect to or initialize the database.", exc_info=True)
             raise
 
+    @property
+    def cursor(self):
+        """
+        Returns the cursor owned by the calling thread, creating it on first use.
+        DuckDB cursors are cheap, but a single one must not be shared by threads
+        running queries at the same time, as they would stomp on each other's results.
+        """
+        cursor = getattr(self._local, 'cursor', None)
+        if cursor is None:
+            cursor = self.connection.cursor()
+            self._local.cursor = cursor
+            with self._cursors_lock:
+                self._cursors.append(cursor)
+        return cursor
+
+    @property
+    def _in_transaction(self):
+        """Whether the calling thread is inside a transaction() block."""
+        return getattr(self._local, 'in_transaction', False)
+
     def create_tables(self):
         """
         Creates the 'products' and 'reviews' tables with UNIQUE constraints
         to prevent duplicate entries.
         """
         try:
+            # Sequences hand out ids in O(1), instead of scanning the table for MAX(id).
+            # A database created before the sequences existed already has rows, so they start after its highest id.
+            self.cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_products START {self._next_free_id('products')};")
+            self.cursor.execute(f"CREATE SEQUENCE IF NOT EXISTS seq_reviews START {self._next_free_id('reviews')};")
+
             # Create products table with a unique constraint on the URL.
             self.cursor.execute("""
                 CREATE TABLE IF NOT EXISTS products (
-                    id              INTEGER PRIMARY KEY,
+                    id              INTEGER PRIMARY KEY DEFAULT nextval('seq_products'),
                     url             VARCHAR UNIQUE NOT NULL,
                     title           VARCHAR,
                     brand           VARCHAR,
@@ -48,7 +95,7 @@ class Database:
             # A composite unique key ensures that the same review isn't inserted twice.
             self.cursor.execute("""
                 CREATE TABLE IF NOT EXISTS reviews (
-                    id              INTEGER PRIMARY KEY,
+                    id              INTEGER PRIMARY KEY DEFAULT nextval('seq_reviews'),
                     product_id      INTEGER,
                     reviewer_name   VARCHAR,
                     rating          INTEGER,
@@ -61,70 +108,74 @@ class Database:
                 );
             """)
 
+            # Index the foreign key so per-product lookups are an index probe, not a scan.
+            # products.url needs no extra index, its UNIQUE constraint already creates one.
+            self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_reviews_product ON reviews(product_id);")
+
             self.connection.commit()
             log.info("Tables 'products' and 'reviews' are ready.")
         except Exception as e:
             log.error("Error creating database tables.", exc_info=True)
 
+    def _next_free_id(self, table):
+        """Returns the id after the highest one in a table, or 1 if the table doesn't exist yet."""
+        exists = self.cursor.execute(
+            "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", (table,)
+        ).fetchone()[0]
+        if not exists:
+            return 1
+        return self.cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
     def upsert_product(self, product_info, url):
         """
         Inserts a new product or updates an existing one based on the URL.
         Returns the product's ID.
         """
-        check_sql = "SELECT id FROM products WHERE url = ?"
+        product_id = self.upsert_products([(url, product_info)]).get(url)
+        if product_id is not None:
+            log.info(f"Upserted product '{product_info['title']}' with ID: {product_id}")
+        return product_id
+
+    def upsert_products(self, products):
+        """
+        Inserts or updates any number of products, given as (url, product_info) pairs,
+        in one statement. Returns a dict mapping each URL to its product ID.
+        """
+        # The last entry wins if the same URL is passed twice, as one statement can't update a row twice.
+        batch = dict(products)
+        if not batch:
+            return {}
+
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?)"] * len(batch))
+        params = []
+        for url, product_info in batch.items():
+            params.append(url)
+            params.extend(product_info[column] for column in PRODUCT_COLUMNS)
+
+        # Insert the products, or refresh their details if the URL is already known, in one statement.
+        upsert_sql = f"""
+            INSERT INTO products (id, url, {", ".join(PRODUCT_COLUMNS)})
+            SELECT nextval('seq_products'), url, {", ".join(PRODUCT_COLUMNS)}
+            FROM (VALUES {placeholders}) AS p(url, {", ".join(PRODUCT_COLUMNS)})
+            ON CONFLICT (url) DO UPDATE
+            SET price = EXCLUDED.price,
+                ratings = EXCLUDED.ratings,
+                reviews_count = EXCLUDED.reviews_count,
+                scraped_at = now()
+        """
+        urls = list(batch)
+        id_sql = f"SELECT url, id FROM products WHERE url IN ({', '.join(['?'] * len(urls))})"
         try:
-            existing = self.cursor.execute(check_sql, (url,)).fetchone()
-
-            if existing:
-                # If the product exists, update its details.
-                update_sql = """
-                    UPDATE products
-                    SET price = ?,
-                        ratings = ?,
-                        reviews_count = ?,
-                        scraped_at = current_timestamp
-                    WHERE url = ?
-                """
-                update_data = (
-                    product_info['price'],
-                    product_info['ratings'],
-                    product_info['reviews_count'],
-                    url
-                )
-                self.cursor.execute(update_sql, update_data)
-                self.connection.commit()
-                product_id = existing[0]
-                log.info(f"Updated existing product '{product_info['title']}' with ID: {product_id}")
-                return product_id
-            else:
-                # If the product does not exist, insert a new record.
-                # Manually get the next ID for the new product.
-                next_id_sql = "SELECT COALESCE(MAX(id), 0) + 1 FROM products"
-                next_id = self.cursor.execute(next_id_sql).fetchone()[0]
-
-                insert_sql = """
-                    INSERT INTO products (
-                        id, url, title, brand, price, ratings, reviews_count, description
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                """
-                product_data = (
-                    next_id,
-                    url,
-                    product_info['title'],
-                    product_info['brand'],
-                    product_info['price'],
-                    product_info['ratings'],
-                    product_info['reviews_count'],
-                    product_info['description']
-                )
-                self.cursor.execute(insert_sql, product_data)
-                self.connection.commit()
-
-                log.info(f"Inserted new product '{product_info['title']}' with ID: {next_id}")
-                return next_id
+            self.cursor.execute(upsert_sql, params)
+            # RETURNING can't be used here: DuckDB rejects it on a conflict update of a row
+            # that reviews reference through their foreign key, so we look the ids up instead.
+            return dict(self.cursor.execute(id_sql, urls).fetchall())
         except Exception as e:
-            log.error(f"Failed to upsert product: {product_info.get('title')}", exc_info=True)
-            return None
+            log.error(f"Failed to upsert products: {urls}", exc_info=True)
+            # Inside a transaction the failure has to reach transaction(), so it rolls back.
+            if self._in_transaction:
+                raise
+            return {}
 
     def upsert_review(self, review_info, product_id):
         """
@@ -136,37 +187,18 @@ class Database:
                 log.warning(f"Skipping review by {review_info.get('reviewer_name')} because product_id is None.")
                 return
 
-            # Check if review already exists.
-            check_sql = """
-                SELECT id
-                FROM reviews
-                WHERE product_id = ?
-                  AND reviewer_name = ?
-                  AND date_of_review = ?
-            """
-            existing = self.cursor.execute(check_sql, (
-                product_id,
-                review_info['reviewer_name'],
-                review_info['date_of_review']
-            )).fetchone()
-
-            if existing:
-                log.debug(f"Review by {review_info['reviewer_name']} already exists, skipping.")
-                return
-
-            # Get the next available ID for the new review.
-            next_id_sql = "SELECT COALESCE(MAX(id), 0) + 1 FROM reviews"
-            next_id = self.cursor.execute(next_id_sql).fetchone()[0]
-
-            # Insert the new review.
+            # Insert the new review, the id is taken from the sequence. It's bound explicitly,
+            # as tables created before the sequences existed have no DEFAULT for it.
+            # The UNIQUE constraint's index does the duplicate check for us.
             insert_sql = """
                 INSERT INTO reviews (
                     id, product_id, reviewer_name, rating, review_title, review_body,
                     date_of_review, verified_buyer
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (nextval('seq_reviews'), ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (product_id, reviewer_name, date_of_review) DO NOTHING
+                RETURNING id
             """
             review_data = (
-                next_id,
                 product_id,
                 review_info['reviewer_name'],
                 review_info['rating'],
@@ -175,14 +207,109 @@ class Database:
                 review_info['date_of_review'],
                 review_info['verified_buyer']
             )
-            self.cursor.execute(insert_sql, review_data)
-            self.connection.commit()
-            log.debug(f"Inserted review by {review_info['reviewer_name']} with ID: {next_id}")
+            inserted = self.cursor.execute(insert_sql, review_data).fetchone()
+            if inserted is None:
+                log.debug(f"Review by {review_info['reviewer_name']} already exists, skipping.")
+                return
+            log.debug(f"Inserted review by {review_info['reviewer_name']} with ID: {inserted[0]}")
         except Exception as e:
             log.warning(f"Failed to upsert review by {review_info.get('reviewer_name')}", exc_info=True)
+            if self._in_transaction:
+                raise
+
+    def bulk_upsert_reviews(self, reviews, product_id):
+        """
+        Inserts all new reviews for a product, REVIEW_BATCH_SIZE rows per statement.
+        Reviews that already exist (same product, reviewer and date) are skipped.
+        Returns the number of reviews actually inserted.
+        """
+        if product_id is None:
+            log.warning(f"Skipping {len(reviews)} reviews because product_id is None.")
+            return 0
+        if not reviews:
+            return 0
+
+        # Drop duplicates within the batch itself, the UNIQUE constraint would reject them otherwise.
+        unique_reviews = {}
+        for review in reviews:
+            unique_reviews.setdefault((review['reviewer_name'], review['date_of_review']), review)
+        unique_reviews = list(unique_reviews.values())
+
+        inserted = 0
+        try:
+            # Flush in fixed size batches so a product with thousands of reviews doesn't
+            # build one enormous statement with tens of thousands of parameters.
+            for start in range(0, len(unique_reviews), REVIEW_BATCH_SIZE):
+                inserted += self._insert_review_batch(unique_reviews[start:start + REVIEW_BATCH_SIZE], product_id)
+            log.info(
+                f"Inserted {inserted} new reviews for product ID: {product_id}, "
+                f"{len(unique_reviews) - inserted} were already stored."
+            )
+        except Exception as e:
+            log.warning(f"Failed to bulk upsert reviews for product ID: {product_id}", exc_info=True)
+            if self._in_transaction:
+                raise
+        return inserted
+
+    def _insert_review_batch(self, batch, product_id):
+        """
+        Inserts one batch of reviews as a single VALUES list, skipping the ones already stored.
+        Returns the number of rows inserted.
+        """
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, ?)"] * len(batch))
+        params = [product_id]
+        for review in batch:
+            params.extend(review[column] for column in REVIEW_COLUMNS)
+        params.append(product_id)
+
+        # The batch goes in as one VALUES list, so DuckDB does a single
+        # vectorized insert instead of one roundtrip per review.
+        insert_sql = f"""
+            INSERT INTO reviews (
+                id, product_id, reviewer_name, rating, review_title, review_body,
+                date_of_review, verified_buyer
+            )
+            SELECT
+                nextval('seq_reviews'), ?, b.reviewer_name, b.rating, b.review_title, b.review_body,
+                b.date_of_review, b.verified_buyer
+            FROM (VALUES {placeholders}) AS b({", ".join(REVIEW_COLUMNS)})
+            WHERE NOT EXISTS (
+                SELECT 1
+                FROM reviews r
+                WHERE r.product_id = ?
+                  AND r.reviewer_name = b.reviewer_name
+                  AND r.date_of_review = b.date_of_review
+            )
+        """
+        # An INSERT without RETURNING gives back the number of rows it inserted.
+        return self.cursor.execute(insert_sql, params).fetchone()[0]
+
+    @contextmanager
+    def transaction(self):
+        """
+        Groups several writes into one transaction, so a whole page is committed at once
+        instead of one commit per row. Everything is rolled back if the block raises.
+        Inside the block the write methods raise on failure instead of only logging it,
+        otherwise the commit would silently drop the whole transaction.
+        """
+        self.cursor.begin()
+        self._local.in_transaction = True
+        try:
+            yield
+        except Exception:
+            self.cursor.rollback()
+            raise
+        else:
+            self.cursor.commit()
+        finally:
+            self._local.in_transaction = False
 
     def close(self):
-        """Closes the database connection."""
+        """Closes every cursor handed out and then the database connection."""
         if self.connection:
+            with self._cursors_lock:
+                for cursor in self._cursors:
+                    cursor.close()
+                self._cursors.clear()
             self.connection.close()
             log.info("Database connection closed.")
@@ -1,66 +1,93 @@
 import asyncio
+import os
+import queue
 from web_scraper.config import BASE_URLS
 from web_scraper.scraper import WebScraper
 from duck_db.database import Database
 import logging
+from logging.handlers import QueueHandler, QueueListener
 
 log = logging.getLogger(__name__)
 
 
 def setup_logging():
-    """Configure logging for the scraper."""
+    """
+    Configure logging for the scraper.
+
+    Records are put on a queue and written out by a background listener thread,
+    so the scraping code never waits on file or console I/O. The level defaults to
+    WARNING and can be raised with the LOG_LEVEL env var (e.g. LOG_LEVEL=INFO).
+    Returns the listener, which must be stopped on exit to flush the queue.
+    """
     logger = logging.getLogger()
-    if not logger.handlers:
-        logger.setLevel(logging.INFO)
-        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if logger.hasHandlers():
+        return None
+    logger.setLevel(os.getenv('LOG_LEVEL', 'WARNING').upper())
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
     # We will stream logs to stdout and also write logs to a log file.
 
-    # 1. Create a handler to write logs to a file
-        file_handler = logging.FileHandler('./logs/scraper.log', mode='w')
-        file_handler.setLevel(logging.INFO)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+    # 1. Create a handler to write logs to a file, only opened once something is logged
+    file_handler = logging.FileHandler('./logs/scraper.log', mode='w', delay=True)
+    file_handler.setFormatter(formatter)
 
     # 2. Create a handler to stream logs to the console
-        stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(logging.INFO)
-        stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    # 3. Both handlers are driven from the listener thread, the loggers only touch the queue
+    log_queue = queue.SimpleQueue()
+    logger.addHandler(QueueHandler(log_queue))
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    return listener
 
 
-async def scrape_page(url: str, db: Database):
+def save_page(db: Database, url: str, product_info: dict, reviews: list):
+    """
+    Writes a product and all its reviews together in one transaction.
+    The whole transaction runs in the calling thread, on that thread's own cursor.
+    If any write fails nothing of the page is kept, and the error is raised to the caller.
+    """
+    with db.transaction():
+        # Both writes log what they stored themselves.
+        product_id = db.upsert_product(product_info, url=url)
+
+        if reviews:
+            db.bulk_upsert_reviews(reviews, product_id)
+        else:
+            log.info(f"No reviews were extracted for {url}.")
+
+
+async def scrape_page(url: str, db: Database, semaphore: asyncio.Semaphore):
     """
     This function will scrape a single product page and store its data.
     It's a complete package, you know? Handles everything for one URL.
     """
-    log.info(f"Starting scraper for URL: {url}")
-    scraper = WebScraper(url)
-    try:
-        if await scraper.navigate_to_page():
-            product_info = await scraper.get_product_info()
-
-            if product_info and product_info.get('title'):
-                product_id = db.upsert_product(product_info, url=url)
-                log.info(f"Product '{product_info['title']}' data saved with ID: {product_id}")
-
-                reviews = await scraper.get_reviews()
-                if reviews:
-                    for review in reviews:
-                        db.upsert_review(review, product_id)
-                    log.info(f"Successfully saved {len(reviews)} reviews for product ID: {product_id}")
+    # Only a few scrapes run at once, the rest wait here for a free slot.
+    async with semaphore:
+        log.info(f"Starting scraper for URL: {url}")
+        scraper = WebScraper(url)
+        try:
+            if await scraper.navigate_to_page():
+                product_info = await scraper.get_product_info()
+
+                if product_info and product_info.get('title'):
+                    reviews = await scraper.get_reviews()
+
+                    # DuckDB calls are blocking, so they run in a worker thread and the other
+                    # scrapes keep going in the meantime.
+                    await asyncio.to_thread(save_page, db, url, product_info, reviews)
                 else:
-                    log.info(f"No reviews were extracted for {url}.")
-            else:
-                log.info(f"Failed to extract essential product information from {url}. Aborting.")
+                    log.info(f"Failed to extract essential product information from {url}. Aborting.")
 
-    except Exception as e:
-        log.error(f"A fatal error occurred while scraping {url}: {e}")
+        except Exception as e:
+            log.error(f"A fatal error occurred while scraping {url}: {e}")
 
-    finally:
-        # Ensure all resources are always cleaned up
-        await scraper.close()
-        log.info(f"Scraper finished for URL: {url}")
+        finally:
+            # Ensure all resources are always cleaned up
+            await scraper.close()
+            log.info(f"Scraper finished for URL: {url}")
 
 
 async def main():
@@ -68,18 +95,30 @@ async def main():
     Our main function, but now it's a manager! It will start all the scraping jobs
     and wait for them to finish. Proper parallel processing, dekh lo!
     """
-    setup_logging()
-    log.info("Starting the parallel scraper job.")
-    db = Database()
+    listener = setup_logging()
+    db = None
+    try:
+        log.info("Starting the parallel scraper job.")
+        db = Database()
 
-    # We create a list of tasks, one for each URL.
-    tasks = [scrape_page(url, db) for url in BASE_URLS]
+        # Past a handful of parallel scrapes the network, the browser and the single DuckDB
+        # writer become the bottleneck, so concurrency is capped (SCRAPE_CONCURRENCY env var).
+        semaphore = asyncio.Semaphore(int(os.getenv('SCRAPE_CONCURRENCY', 4)))
 
-    # asyncio.gather will run all our scraping tasks at the same time.
-    await asyncio.gather(*tasks)
+        # We create a list of tasks, one for each URL. They all share one browser,
+        # every URL only gets its own context in it.
+        tasks = [scrape_page(url, db, semaphore) for url in BASE_URLS]
 
-    db.close()
-    log.info("All scraping jobs finished.")
+        # asyncio.gather will run our scraping tasks at the same time, up to the cap.
+        await asyncio.gather(*tasks)
+        log.info("All scraping jobs finished.")
+    finally:
+        # Also on errors, so the connection is closed and the records still on
+        # the queue (like why we failed) get written out.
+        if db is not None:
+            db.close()
+        if listener:
+            listener.stop()
 
 
 if __name__ == '__main__':
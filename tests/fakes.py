@@ -0,0 +1,64 @@
+"""Small stand-ins for the Playwright objects, shared by the tests that don't need a real browser."""
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+
+class FakeLocator:
+    async def click(self):
+        pass
+
+
+class FakePage:
+    """
+    A fake page where only the given selectors ever appear. The first `goto_failures`
+    navigations time out, and any page script evaluated on it returns `reviews`.
+    """
+
+    def __init__(self, *present, goto_failures=0, reviews=()):
+        self.present = present
+        self.waited_for = []
+        self.visited = []
+        self.goto_failures = goto_failures
+        self.reviews = list(reviews)
+        self.closed = False
+
+    async def goto(self, url, **options):
+        self.visited.append(url)
+        if len(self.visited) <= self.goto_failures:
+            raise PlaywrightTimeoutError(f"Timeout loading {url}")
+
+    def locator(self, selector):
+        return FakeLocator()
+
+    async def eval_on_selector_all(self, selector, expression, arg=None):
+        return self.reviews
+
+    async def wait_for_selector(self, selector, timeout=None):
+        self.waited_for.append(selector)
+        if selector not in self.present:
+            raise PlaywrightTimeoutError(f"{selector} not found")
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    """Stands in for a Playwright browser context, only hands out fake pages."""
+
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+
+class FakeBrowser:
+    """Stands in for a Playwright browser, only records the options of new_context()."""
+
+    def __init__(self):
+        self.context_options = []
+
+    async def new_context(self, **options):
+        self.context_options.append(options)
+        return object()
@@ -0,0 +1,186 @@
+import duckdb
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from duck_db.database import Database
+
+
+PRODUCT_INFO = {
+    'title': 'AMD Ryzen 7 9800X3D',
+    'brand': 'AMD',
+    'price': '$479.00',
+    'ratings': '4.8 out of 5 eggs',
+    'reviews_count': 484,
+    'description': 'CES 2025 Innovation Awards Honoree',
+}
+
+
+def make_review(reviewer_name, date_of_review='8/1/2025', rating=5):
+    return {
+        'reviewer_name': reviewer_name,
+        'rating': rating,
+        'review_title': 'Great CPU',
+        'review_body': 'Runs cool and fast.',
+        'date_of_review': date_of_review,
+        'verified_buyer': 'Yes',
+    }
+
+
+# A fresh database file for every test, so tests never see each other's rows.
+@pytest.fixture
+def db(tmp_path):
+    database = Database(db_name=str(tmp_path / "test.duckdb"))
+    yield database
+    database.close()
+
+
+def count_reviews(db):
+    return db.connection.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+
+
+def test_bulk_upsert_reviews_inserts_batch(db):
+    """All reviews in a batch are written and get distinct ids."""
+    product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+    reviews = [make_review(f"user{i}") for i in range(5)]
+
+    db.bulk_upsert_reviews(reviews, product_id)
+
+    ids = db.connection.execute("SELECT id FROM reviews ORDER BY id").fetchall()
+    assert len({row[0] for row in ids}) == 5
+
+
+def test_bulk_upsert_reviews_skips_existing_and_duplicates(db):
+    """
+    Re-running the scraper must not create duplicate reviews, whether the
+    duplicate is already in the table or appears twice in the same batch.
+    """
+    product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+    assert db.bulk_upsert_reviews([make_review("alice"), make_review("bob")], product_id) == 2
+
+    inserted = db.bulk_upsert_reviews(
+        [make_review("alice"), make_review("carol"), make_review("carol")],
+        product_id
+    )
+
+    assert inserted == 1
+    assert count_reviews(db) == 3
+
+
+def test_upsert_product_updates_existing_url(db):
+    """Upserting the same URL twice keeps one row and refreshes the price."""
+    url = "https://example.com/p/1"
+    first_id = db.upsert_product(PRODUCT_INFO, url=url)
+    second_id = db.upsert_product({**PRODUCT_INFO, 'price': '$449.00'}, url=url)
+
+    assert first_id == second_id
+    rows = db.connection.execute("SELECT price FROM products").fetchall()
+    assert rows == [('$449.00',)]
+
+
+def test_upsert_product_with_existing_reviews(db):
+    """A product that already has reviews can still be updated on a re-run."""
+    url = "https://example.com/p/1"
+    product_id = db.upsert_product(PRODUCT_INFO, url=url)
+    db.bulk_upsert_reviews([make_review("alice")], product_id)
+
+    assert db.upsert_product({**PRODUCT_INFO, 'price': '$449.00'}, url=url) == product_id
+
+
+def test_transaction_rolls_back_on_error(db):
+    """If anything fails inside a transaction, none of its writes are kept."""
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+            db.bulk_upsert_reviews([make_review("alice")], product_id)
+            raise RuntimeError("scrape failed")
+
+    assert count_reviews(db) == 0
+    assert db.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0
+
+
+def test_transaction_rolls_back_on_failed_insert(db):
+    """A write that fails inside a transaction raises, and the writes before it are rolled back too."""
+    with pytest.raises(duckdb.Error):
+        with db.transaction():
+            product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+            db.bulk_upsert_reviews([make_review("alice", rating="five stars")], product_id)
+
+    assert db.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 0
+    # Outside a transaction a failed write is still only logged.
+    db.bulk_upsert_reviews([make_review("alice", rating="five stars")], product_id=1)
+
+
+def test_bulk_upsert_reviews_spans_multiple_batches(db, monkeypatch):
+    """Reviews are flushed in batches, and every batch makes it into the table."""
+    monkeypatch.setattr("duck_db.database.REVIEW_BATCH_SIZE", 2)
+    product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+
+    assert db.bulk_upsert_reviews([make_review(f"user{i}") for i in range(5)], product_id) == 5
+    assert count_reviews(db) == 5
+
+
+def test_cursor_is_per_thread(db):
+    """Each thread gets its own cursor, and a thread keeps reusing the same one."""
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        worker_cursor = pool.submit(lambda: db.cursor).result()
+
+    assert db.cursor is db.cursor
+    assert worker_cursor is not db.cursor
+
+
+def test_upsert_review_skips_existing(db):
+    """Upserting the same review twice only stores it once."""
+    product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+
+    db.upsert_review(make_review("alice"), product_id)
+    db.upsert_review(make_review("alice"), product_id)
+
+    assert count_reviews(db) == 1
+
+
+def test_upsert_products_returns_id_per_url(db):
+    """Several products can be upserted at once, each URL maps to its own id."""
+    existing_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/1")
+
+    ids = db.upsert_products([
+        ("https://example.com/p/1", {**PRODUCT_INFO, 'price': '$449.00'}),
+        ("https://example.com/p/2", {**PRODUCT_INFO, 'description': None}),
+    ])
+
+    assert ids["https://example.com/p/1"] == existing_id
+    assert ids["https://example.com/p/2"] != existing_id
+    assert db.connection.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 2
+
+
+def test_opens_database_created_without_sequences(tmp_path):
+    """A database file from before the id sequences existed keeps working, and new ids don't collide."""
+    db_path = str(tmp_path / "old.duckdb")
+    connection = duckdb.connect(db_path)
+    connection.execute("""
+        CREATE TABLE products (
+            id INTEGER PRIMARY KEY, url VARCHAR UNIQUE NOT NULL, title VARCHAR, brand VARCHAR,
+            price VARCHAR, ratings VARCHAR, reviews_count INTEGER, description TEXT,
+            scraped_at TIMESTAMP DEFAULT current_timestamp
+        )
+    """)
+    connection.execute("""
+        CREATE TABLE reviews (
+            id INTEGER PRIMARY KEY, product_id INTEGER, reviewer_name VARCHAR, rating INTEGER,
+            review_title VARCHAR, review_body TEXT, date_of_review VARCHAR, verified_buyer VARCHAR,
+            FOREIGN KEY (product_id) REFERENCES products(id),
+            UNIQUE (product_id, reviewer_name, date_of_review)
+        )
+    """)
+    connection.execute("INSERT INTO products (id, url, title) VALUES (1, 'https://example.com/p/1', 'Old')")
+    connection.execute("INSERT INTO reviews (id, product_id, reviewer_name, date_of_review) VALUES (1, 1, 'alice', '8/1/2025')")
+    connection.close()
+
+    db = Database(db_name=db_path)
+    try:
+        product_id = db.upsert_product(PRODUCT_INFO, url="https://example.com/p/2")
+        db.bulk_upsert_reviews([make_review("bob")], product_id)
+        db.upsert_review(make_review("carol"), product_id)
+
+        assert product_id == 2
+        assert count_reviews(db) == 3
+    finally:
+        db.close()
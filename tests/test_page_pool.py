@@ -0,0 +1,45 @@
+import asyncio
+import pytest
+from web_scraper.page_pool import PlaywrightPagePool
+from tests.fakes import FakeContext
+
+
+@pytest.mark.asyncio
+async def test_pages_are_opened_once_and_reused():
+    """The pool opens all its pages on first use, and a released page is handed out again."""
+    context = FakeContext()
+    pool = PlaywrightPagePool(context, size=2)
+
+    first = await pool.acquire()
+    second = await pool.acquire()
+    pool.release(first)
+    third = await pool.acquire()
+
+    assert len(context.pages) == 2
+    assert first is not second
+    assert third is first
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_a_released_page():
+    """With every page handed out, acquire() blocks until one is released."""
+    pool = PlaywrightPagePool(FakeContext(), size=1)
+    page = await pool.acquire()
+
+    waiting = asyncio.ensure_future(pool.acquire())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    pool.release(page)
+    assert await asyncio.wait_for(waiting, timeout=1) is page
+
+
+@pytest.mark.asyncio
+async def test_close_closes_every_page():
+    context = FakeContext()
+    pool = PlaywrightPagePool(context, size=3)
+    await pool.acquire()
+
+    await pool.close()
+
+    assert all(page.closed for page in context.pages)
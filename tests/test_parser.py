@@ -2,7 +2,7 @@ import pytest
 import re
 from playwright.async_api import async_playwright
 from pathlib import Path
-from web_scraper.data_parser import DataParser
+from web_scraper.data_parser import DataParser, _parse_reviews_count
 
 
 # A pytest fixture to load the HTML content once for all tests in this file
@@ -70,4 +70,83 @@ async def test_extract_product_info_missing_title(html_content):
     assert 'title' not in product_info or product_info['title'] is None
 
 
+@pytest.mark.asyncio
+async def test_extract_product_info_missing_brand_and_price():
+    """
+    Tests that fields missing from the page come back as None (or their defaults),
+    while the fields that are there are still extracted.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        await page.set_content('<h1 class="product-title">AMD Ryzen 7 9800X3D</h1>')
+
+        product_info = await DataParser.extract_product_info(page)
+        await browser.close()
+
+    assert product_info['title'] == "AMD Ryzen 7 9800X3D"
+    assert product_info['brand'] is None
+    assert product_info['price'] is None
+    assert product_info['ratings'] == "No rating text"
+    assert product_info['reviews_count'] == 0
+    assert product_info['description'] == ""
+
+
+REVIEWS_HTML = """
+<div class="comments">
+  <div class="comments-cell">
+    <div class="comments-name">Alice</div>
+    <div class="comments-title">
+      <i class="rating rating-5"></i>
+      <span class="comments-title-content">Fast and cool</span>
+      <span class="comments-text">8/1/2025</span>
+    </div>
+    <div class="comments-content">Great gaming CPU.</div>
+    <div class="comments-verified-owner">Verified Owner</div>
+  </div>
+  <div class="comments-cell">
+    <div class="comments-name">Bob</div>
+    <div class="comments-title">
+      <i class="rating rating-3"></i>
+      <span class="comments-title-content">Runs hot</span>
+      <span class="comments-text">7/15/2025</span>
+    </div>
+    <div class="comments-content">Needs a good cooler.</div>
+  </div>
+</div>
+"""
+
+
+@pytest.mark.asyncio
+async def test_extract_all_reviews():
+    """
+    Tests that every review on the page is extracted in one pass,
+    including the rating parsed from the icon class and the verified badge.
+    """
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page()
+        await page.set_content(REVIEWS_HTML)
+
+        reviews = await DataParser.extract_all_reviews(page)
+        await browser.close()
+
+    assert [review['reviewer_name'] for review in reviews] == ["Alice", "Bob"]
+    assert [review['rating'] for review in reviews] == [5, 3]
+    assert reviews[0]['review_title'] == "Fast and cool"
+    assert reviews[0]['date_of_review'] == "8/1/2025"
+    assert [review['verified_buyer'] for review in reviews] == ["Yes", "No"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("(484)", 484),
+    ("(1,234)", 1234),
+    ("", 0),
+    (None, 0),
+])
+def test_parse_reviews_count(text, expected):
+    """Review counts with thousands separators are parsed whole, missing counts become 0."""
+    assert _parse_reviews_count(text) == expected
+
+
 # Similar tests can be written for other parts of the parser.
\ No newline at end of file
@@ -0,0 +1,239 @@
+import asyncio
+import json
+import pytest
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+from web_scraper import scraper
+from web_scraper.config import USER_AGENTS
+from web_scraper.scraper import WebScraper
+from tests.fakes import FakeBrowser, FakeContext, FakePage
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    path = tmp_path / ".cf_state.json"
+    monkeypatch.setattr(scraper, "STORAGE_STATE_PATH", str(path))
+    return path
+
+
+def test_unreadable_storage_state_is_dropped(state_path):
+    """A corrupt state file is ignored and deleted, so later scrapes start fresh."""
+    state_path.write_text("{not json")
+
+    assert scraper._load_storage_state() is None
+    assert not state_path.exists()
+
+
+@pytest.mark.asyncio
+async def test_new_context_reuses_saved_user_agent(state_path):
+    """The Cloudflare cookies are only valid with the user agent they were saved with."""
+    state_path.write_text(json.dumps({'cookies': [], 'origins': [], 'user_agent': 'Saved UA'}))
+    browser = FakeBrowser()
+    web_scraper = WebScraper("https://example.com/p/1", browser=browser)
+
+    await web_scraper._new_context(scraper._load_storage_state())
+
+    assert browser.context_options == [
+        {'user_agent': 'Saved UA', 'storage_state': {'cookies': [], 'origins': []}}
+    ]
+
+
+@pytest.mark.asyncio
+async def test_new_context_without_state_picks_random_user_agent():
+    browser = FakeBrowser()
+    web_scraper = WebScraper("https://example.com/p/1", browser=browser)
+
+    await web_scraper._new_context(None)
+
+    assert browser.context_options[0]['user_agent'] in USER_AGENTS
+    assert browser.context_options[0]['storage_state'] is None
+
+
+@pytest.mark.asyncio
+async def test_close_releases_shared_browser_when_context_close_fails(monkeypatch):
+    """A context that fails to close must not keep the shared browser alive."""
+    released = []
+
+    async def fake_release():
+        released.append(True)
+
+    class BrokenContext:
+        async def close(self):
+            raise RuntimeError("Target closed")
+
+    monkeypatch.setattr(scraper, "_release_shared_browser", fake_release)
+    web_scraper = WebScraper("https://example.com/p/1")
+    web_scraper.browser = FakeBrowser()
+    web_scraper.context = BrokenContext()
+
+    with pytest.raises(RuntimeError):
+        await web_scraper.close()
+    await web_scraper.close()
+
+    assert released == [True]
+
+
+@pytest.mark.asyncio
+async def test_execute_with_retries_retries_timeouts(monkeypatch):
+    """Timeouts are retried up to RETRY_COUNT times, and the result of the first success is returned."""
+    monkeypatch.setattr(scraper, "_retry_delay", lambda attempt: 0)
+    web_scraper = WebScraper("https://example.com/p/1", browser=FakeBrowser())
+    web_scraper._initialized = True
+    attempts = []
+
+    async def flaky_action():
+        attempts.append(True)
+        if len(attempts) < scraper.RETRY_COUNT:
+            raise PlaywrightTimeoutError("slow page")
+        return True
+
+    assert await web_scraper._execute_with_retries(flaky_action, "Flaky action") is True
+    assert len(attempts) == scraper.RETRY_COUNT
+
+
+def test_review_page_url_keeps_query_and_fragment():
+    """The page number is added to the existing query string, the fragment stays in place."""
+    web_scraper = WebScraper("https://www.newegg.com/p/N82E16819113877?Item=N82E16819113877&Tpk=x#IsFeedbackTab")
+
+    assert web_scraper._review_page_url(3) == (
+        "https://www.newegg.com/p/N82E16819113877?Item=N82E16819113877&Tpk=x&PageNumber=3#IsFeedbackTab"
+    )
+
+
+def test_review_page_url_replaces_existing_page_number():
+    web_scraper = WebScraper("https://www.newegg.com/p/N82E16819113877?PageNumber=1")
+
+    assert web_scraper._review_page_url(2) == "https://www.newegg.com/p/N82E16819113877?PageNumber=2"
+
+
+@pytest.mark.asyncio
+async def test_remaining_review_pages_keep_page_order(monkeypatch):
+    """Reviews come back in page order, even when later pages finish first."""
+    monkeypatch.setattr(scraper, "REVIEW_PAGE_POOL_SIZE", 3)
+    web_scraper = WebScraper("https://example.com/p/1", browser=FakeBrowser())
+    web_scraper.context = FakeContext()
+
+    async def fake_scrape_review_page(url, pool):
+        page = await pool.acquire()
+        try:
+            page_number = int(url.rsplit("=", 1)[1])
+            # Later pages are quicker, so they finish out of order.
+            await asyncio.sleep(0.01 * (10 - page_number))
+            return [f"review {page_number}a", f"review {page_number}b"]
+        finally:
+            pool.release(page)
+
+    monkeypatch.setattr(web_scraper, "_scrape_review_page", fake_scrape_review_page)
+
+    reviews = await web_scraper._get_remaining_review_pages(total_pages=6)
+
+    assert reviews == [f"review {n}{part}" for n in range(2, 7) for part in "ab"]
+    assert len(web_scraper.context.pages) == 3
+    assert all(page.closed for page in web_scraper.context.pages)
+
+
+@pytest.mark.asyncio
+async def test_wait_for_reviews_waits_for_review_items():
+    """The container alone is not enough, the first review item has to be there too."""
+    reviews = scraper.SELECTORS['reviews']
+    page = FakePage(reviews['container'], reviews['review_item'])
+
+    assert await WebScraper._wait_for_reviews(page) is True
+    assert page.waited_for == [reviews['container'], reviews['review_item']]
+    assert await WebScraper._wait_for_reviews(FakePage(reviews['container'])) is False
+
+
+class SinglePagePool:
+    """A pool with one fixed page, that remembers whether the page was given back."""
+
+    def __init__(self, page=None):
+        self.page = page
+        self.released = []
+
+    async def acquire(self):
+        if self.page is None:
+            raise RuntimeError("new_page failed")
+        return self.page
+
+    def release(self, page):
+        self.released.append(page)
+
+
+@pytest.fixture
+def no_waits(monkeypatch):
+    monkeypatch.setattr(scraper, "_retry_delay", lambda attempt: 0)
+    monkeypatch.setattr(scraper.random, "uniform", lambda low, high: 0)
+
+
+@pytest.mark.asyncio
+async def test_scrape_review_page_retries_timeouts(no_waits):
+    """A pooled review page that times out is retried like the clicked through pages."""
+    reviews = scraper.SELECTORS['reviews']
+    page = FakePage(reviews['container'], reviews['review_item'], goto_failures=1, reviews=[{'reviewer_name': 'alice'}])
+    pool = SinglePagePool(page)
+    web_scraper = WebScraper("https://example.com/p/1", browser=FakeBrowser())
+    web_scraper._initialized = True
+
+    result = await web_scraper._scrape_review_page("https://example.com/p/1?PageNumber=2", pool)
+
+    assert result == [{'reviewer_name': 'alice'}]
+    assert len(page.visited) == 2
+    assert pool.released == [page]
+
+
+@pytest.mark.asyncio
+async def test_scrape_review_page_handles_failing_acquire(no_waits):
+    """If no page can be opened, the page of reviews is skipped and nothing is released."""
+    pool = SinglePagePool()
+    web_scraper = WebScraper("https://example.com/p/1", browser=FakeBrowser())
+    web_scraper._initialized = True
+
+    assert await web_scraper._scrape_review_page("https://example.com/p/1?PageNumber=2", pool) == []
+    assert pool.released == []
+
+
+@pytest.mark.asyncio
+async def test_failed_launch_stops_the_driver(monkeypatch):
+    """If the browser can't be launched, the driver is stopped and nothing is left half started."""
+    stopped = []
+
+    class FailingChromium:
+        async def launch(self, **options):
+            raise RuntimeError("Executable doesn't exist")
+
+    class FakeDriver:
+        chromium = FailingChromium()
+
+        async def start(self):
+            return self
+
+        async def stop(self):
+            stopped.append(True)
+
+    monkeypatch.setattr(scraper, "async_playwright", FakeDriver)
+
+    with pytest.raises(RuntimeError):
+        await scraper._acquire_shared_browser()
+
+    assert stopped == [True]
+    assert scraper._PW is None and scraper._BROWSER is None and scraper._REFCOUNT == 0
+
+
+@pytest.mark.asyncio
+async def test_shutdown_errors_are_logged(monkeypatch, caplog):
+    """The last release closes browser and driver, and a failure in either is logged, not dropped."""
+    class CrashedBrowser:
+        async def close(self):
+            raise RuntimeError("Target closed")
+
+    class FakeDriver:
+        async def stop(self):
+            pass
+
+    monkeypatch.setattr(scraper, "_BROWSER", CrashedBrowser())
+    monkeypatch.setattr(scraper, "_PW", FakeDriver())
+    monkeypatch.setattr(scraper, "_REFCOUNT", 1)
+
+    await scraper._release_shared_browser()
+
+    assert scraper._BROWSER is None and scraper._PW is None
+    assert "Could not shut down the browser cleanly: Target closed" in caplog.text
@@ -1,10 +1,30 @@
+import os
+
 BASE_URLS = [
     "https://www.newegg.com/amd-ryzen-7-9000-series-ryzen-7-9800x3d-granite-ridge-zen-5-socket-am5-desktop-cpu-processor/p/N82E16819113877",
     # add more URLs here if needed
 ]
-HEADLESS_MODE = False  # set to False if you want to see the actions happening in the browser
+# Headless by default, run with HEADLESS_MODE=false if you want to see the actions happening in the browser
+HEADLESS_MODE = os.getenv('HEADLESS_MODE', 'true').lower() != 'false'
+# Server-friendly Chromium flags, nothing needs to be painted since we only read text.
+BROWSER_LAUNCH_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-background-networking",
+    "--disable-extensions"
+]
 RETRY_COUNT = 3
 RETRY_DELAY_SECONDS = 5
+# Cookies and local storage saved after getting past Cloudflare, reused by the next browser contexts.
+STORAGE_STATE_PATH = './.cf_state.json'
+REVIEW_PAGE_POOL_SIZE = 4  # review pages fetched in parallel, set to 1 to click through them one by one
+
+# Requests we never need since we only read text, they are aborted to save bandwidth.
+# Stylesheets are kept on purpose, the visibility checks on the page depend on the layout.
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_PARTS = ("google-analytics", "doubleclick", "facebook.net", "hotjar")
 
 # A dictionary containing all the CSS selectors used for scraping.
 SELECTORS = {
@@ -26,7 +46,8 @@ SELECTORS = {
         "comment_body": 'div.comments-content',
         "date": 'div.comments-title > span.comments-text',  # check title
         "verified_badge": 'div.comments-verified-owner',
-        "next_page_button": 'a.paginations-next'
+        "next_page_button": 'a.paginations-next',
+        "pagination_buttons": 'ol.paginations a.button'
     },
     "dialogs": {  # find any dialog popup and fetch its close button
         "close_promo_button": '[aria-label="close"]'
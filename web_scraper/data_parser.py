@@ -1,4 +1,3 @@
-import datetime
 import re
 import logging
 from .config import SELECTORS
@@ -6,6 +5,67 @@ from .config import SELECTORS
 
 log = logging.getLogger(__name__)
 
+# Compiled once here instead of on every product parse.
+# Matches counts like "484" as well as "1,234" with thousands separators.
+_COUNT_RE = re.compile(r'\d[\d,]*')
+
+# Runs inside the page and reads every product field in one go, so the whole product
+# costs a single round-trip to the browser. Fields that can't be found come back as null.
+_EXTRACT_PRODUCT_JS = """
+(sel) => {
+    // Selectors starting with // are XPath (like the brand one), the rest are CSS.
+    const find = s => s.startsWith('//')
+        ? document.evaluate(s, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue
+        : document.querySelector(s);
+    const text = s => find(s)?.innerText ?? null;
+
+    // Within the containers of the selected product option, the <strong> tag that contains
+    // a '$' uniquely identifies the price and resolves the ambiguity.
+    const price = Array.from(document.querySelectorAll(sel.price_container))
+        .flatMap(container => Array.from(container.querySelectorAll('strong')))
+        .find(strong => strong.textContent.includes('$'));
+
+    return {
+        title: text(sel.title),
+        brand: text(sel.brand),
+        price: price?.innerText ?? null,
+        // The overall rating text (e.g., "4.7 out of 5 eggs") comes from the title attribute
+        ratings: find(sel.rating_element)?.getAttribute('title') || 'No rating text',
+        reviews_count_text: text(sel.reviews_count_text),
+        description: Array.from(document.querySelectorAll(sel.description_list)).map(e => e.innerText).join('\\n')
+    };
+}
+"""
+
+# Runs inside the page on a single review element and returns all its fields at once,
+# the rating is parsed from the icon class right there. Missing fields come back empty.
+_PARSE_REVIEW_JS = """
+(el, sel) => {
+    const text = s => el.querySelector(s)?.innerText ?? '';
+    const ratingClass = el.querySelector(sel.rating_icon)?.className ?? '';
+    const match = ratingClass.match(/rating-(\\d+)/);
+    const badge = el.querySelector(sel.verified_badge);
+    return {
+        reviewer_name: text(sel.author),
+        rating: match ? parseInt(match[1]) : 0,
+        review_title: text(sel.title),
+        review_body: text(sel.comment_body),
+        date_of_review: text(sel.date),
+        verified_buyer: badge !== null && badge.getClientRects().length > 0 ? 'Yes' : 'No'
+    };
+}
+"""
+
+# Runs _PARSE_REVIEW_JS on every review item of the page in one go,
+# so a whole page of reviews costs a single round-trip to the browser.
+_EXTRACT_REVIEWS_JS = f"(items, sel) => items.map(el => ({_PARSE_REVIEW_JS.strip()})(el, sel))"
+
+
+def _parse_reviews_count(text):
+    """Picks the number out of a review count like "(1,234)", dropping thousands separators. 0 if there is none."""
+    match = _COUNT_RE.search(text or '')
+    return int(match.group().replace(',', '')) if match else 0
+
 
 class DataParser:
     """Handles parsing of HTML content to extract product and review data."""
@@ -18,33 +78,11 @@ class DataParser:
         log.info("Extracting product information from page...")
         info = {}
         try:
-            info['title'] = await page.locator(SELECTORS['product']['title']).inner_text()
-
-            # Use the new selector for brand
-            info['brand'] = await page.locator(SELECTORS['product']['brand']).inner_text()
-
-            # 1. Find the container for the selected product option.
-            price_container_locator = page.locator(SELECTORS['product']['price_container'])
-
-            # 2. Within that container, find the <strong> tag that contains a '$'.
-            #    This uniquely identifies the price and resolves the ambiguity.
-            price_locator = price_container_locator.locator('strong', has_text='$')
-            info['price'] = await price_locator.inner_text()
-
-            # Get the overall rating text (e.g., "4.7 out of 5 eggs") from the title attribute
-            rating_element = page.locator(SELECTORS['product']['rating_element'])
-            info['ratings'] = await rating_element.get_attribute('title') or "No rating text"
+            # All the fields are read inside the page in one go, see _EXTRACT_PRODUCT_JS.
+            info = await page.evaluate(_EXTRACT_PRODUCT_JS, SELECTORS['product'])
 
             # Get the review count text (e.g., "(302)") and parse the number
-            reviews_count_text = await page.locator(SELECTORS['product']['reviews_count_text']).first.inner_text()
-            # Clean the text by removing parentheses and other non-digit characters
-            reviews_count_digits = re.search(r'\d+', reviews_count_text)
-            info['reviews_count'] = int(reviews_count_digits.group(0)) if reviews_count_digits else 0
-
-            info['description'] = "\n".join(
-                await page.locator(SELECTORS['product']['description_list']).all_inner_texts()
-            )
-            info['scraped_at'] = datetime.datetime.now()
+            info['reviews_count'] = _parse_reviews_count(info.pop('reviews_count_text'))
             return info
         except Exception as e:
             log.error(f"Could not extract all product information due to {e}. Some fields may be missing.", exc_info=True)
@@ -52,26 +90,7 @@ class DataParser:
             return info
 
     @staticmethod
-    async def parse_review(item):
-        """Parses a single review item to extract its details."""
-        try:
-            rating = 0
-            rating_class = await item.locator(SELECTORS['reviews']['rating_icon']).get_attribute('class')
-            if rating_class:
-                match = re.search(r'rating-(\d+)', rating_class)
-                if match:
-                    rating = int(match.group(1))
-
-            review_data = {
-                'reviewer_name': await item.locator(SELECTORS['reviews']['author']).inner_text(),
-                'rating': rating,
-                'review_title': await item.locator(SELECTORS['reviews']['title']).inner_text(),
-                'review_body': await item.locator(SELECTORS['reviews']['comment_body']).inner_text(),
-                'date_of_review': await item.locator(SELECTORS['reviews']['date']).inner_text(),
-                'verified_buyer': 'Yes' if await item.locator(
-                    SELECTORS['reviews']['verified_badge']).is_visible() else 'No'
-            }
-        except Exception as e:
-            log.info(f"Skipping a review due to an extraction error: {e}")
-            return None
-        return review_data
\ No newline at end of file
+    async def extract_all_reviews(page):
+        """Extracts the details of every review item currently shown on the page."""
+        sel = SELECTORS['reviews']
+        return await page.eval_on_selector_all(sel['review_item'], _EXTRACT_REVIEWS_JS, sel)
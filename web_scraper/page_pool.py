@@ -0,0 +1,47 @@
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class PlaywrightPagePool:
+    """
+    A fixed set of pre-opened pages that tasks borrow and hand back.
+
+    All the pages live in the same browser context, so they share its stealth
+    patches and the cookies of the page that already got past Cloudflare.
+    With a pool of N pages, at most N navigations are in flight at once,
+    every other task waits in acquire().
+    """
+
+    def __init__(self, context, size):
+        self.context = context
+        self.size = size
+        self._idle = asyncio.Queue()
+        self._pages = []
+        self._initialized = False
+
+    async def _initialize(self):
+        """Open all the pages of the pool up front, so they are warm when needed."""
+        if not self._initialized:
+            self._initialized = True
+            for _ in range(self.size):
+                page = await self.context.new_page()
+                self._pages.append(page)
+                self._idle.put_nowait(page)
+            log.debug(f"Opened a pool of {self.size} pages.")
+
+    async def acquire(self):
+        """Waits for an idle page and hands it out."""
+        await self._initialize()
+        return await self._idle.get()
+
+    def release(self, page):
+        """Marks a page handed out by acquire() as idle again."""
+        self._idle.put_nowait(page)
+
+    async def close(self):
+        """Closes every page of the pool."""
+        for page in self._pages:
+            await page.close()
+        self._pages.clear()
@@ -1,14 +1,135 @@
 import asyncio
+import json
+import os
 import random
 import logging
+import tempfile
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
 from playwright_stealth import Stealth
 
-from .config import HEADLESS_MODE, RETRY_COUNT, RETRY_DELAY_SECONDS, SELECTORS, USER_AGENTS
+from .config import (
+    BLOCKED_RESOURCE_TYPES, BLOCKED_URL_PARTS, BROWSER_LAUNCH_ARGS, HEADLESS_MODE,
+    RETRY_COUNT, RETRY_DELAY_SECONDS, REVIEW_PAGE_POOL_SIZE, SELECTORS, STORAGE_STATE_PATH, USER_AGENTS
+)
 from .data_parser import DataParser
+from .page_pool import PlaywrightPagePool
 
 log = logging.getLogger(__name__)
 
+# The stealth patches as one script, built once and injected into every page of a context.
+STEALTH_JS = Stealth().script_payload
+
+# Clicks the close button of any promo dialog as soon as it shows up, so the overlays
+# never get in the way of the pagination clicks. Mutations are handled at most once per
+# frame, and only visible buttons are clicked, as a hidden dialog may keep its button around.
+DISMISS_OVERLAYS_JS = f"""
+(() => {{
+    let scheduled = false;
+    const dismiss = () => {{
+        scheduled = false;
+        document.querySelectorAll({json.dumps(SELECTORS['dialogs']['close_promo_button'])}).forEach(button => {{
+            if (button.getClientRects().length > 0) button.click();
+        }});
+    }};
+    new MutationObserver(() => {{
+        if (!scheduled) {{
+            scheduled = true;
+            requestAnimationFrame(dismiss);
+        }}
+    }}).observe(document, {{subtree: true, childList: true}});
+}})();
+"""
+
+# True once the first review item on the page is no longer the given one (same author and text),
+# i.e. the reviews of the page we navigated to have been rendered.
+_REVIEWS_CHANGED_JS = """
+([sel, previousName, previousBody]) => {
+    const item = document.querySelector(sel.review_item);
+    if (item === null) return false;
+    const text = s => item.querySelector(s)?.innerText ?? '';
+    return text(sel.author) !== previousName || text(sel.comment_body) !== previousBody;
+}
+"""
+
+# The parser keeps no state, so every scraper shares this one instance.
+_PARSER = DataParser()
+
+# One Playwright driver and browser shared by every scraper in the process. The first
+# scraper that needs it starts it, and the last one to close shuts it down again.
+_PW = None
+_BROWSER = None
+_REFCOUNT = 0
+_LOCK = asyncio.Lock()
+
+
+def _load_storage_state():
+    """Reads the storage state saved by an earlier scrape, None if there is none or it's unreadable."""
+    if not os.path.exists(STORAGE_STATE_PATH):
+        return None
+    try:
+        with open(STORAGE_STATE_PATH) as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring the unreadable browser storage state: {e}")
+        _discard_storage_state()
+        return None
+
+
+def _discard_storage_state():
+    """Deletes the saved storage state, so the next scrape doesn't trip over it again."""
+    try:
+        os.remove(STORAGE_STATE_PATH)
+    except OSError:
+        pass
+
+
+def _retry_delay(attempt):
+    """Exponential backoff with some random jitter, so retries after a failure slow down and don't line up."""
+    return RETRY_DELAY_SECONDS * 2 ** attempt + random.uniform(0, 1)
+
+
+async def _block_unneeded_requests(route):
+    """Aborts images, fonts, media and trackers, and lets every other request through."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(part in request.url for part in BLOCKED_URL_PARTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def _acquire_shared_browser():
+    """Returns the process-wide browser, launching it on first use."""
+    global _PW, _BROWSER, _REFCOUNT
+    async with _LOCK:
+        if _BROWSER is None:
+            _PW = await async_playwright().start()
+            try:
+                _BROWSER = await _PW.chromium.launch(headless=HEADLESS_MODE, args=BROWSER_LAUNCH_ARGS)
+            except Exception:
+                # Don't leave the driver running, the next scraper would start a second one.
+                await _PW.stop()
+                _PW = None
+                raise
+        _REFCOUNT += 1
+        return _BROWSER
+
+
+async def _release_shared_browser():
+    """Gives back the process-wide browser, closing it when nobody uses it anymore."""
+    global _PW, _BROWSER, _REFCOUNT
+    async with _LOCK:
+        _REFCOUNT -= 1
+        if _REFCOUNT == 0:
+            log.info("Closing browser.")
+            # Both talk to the driver process, so they are sent off together.
+            results = await asyncio.gather(_BROWSER.close(), _PW.stop(), return_exceptions=True)
+            for name, result in zip(("browser", "playwright driver"), results):
+                if isinstance(result, Exception):
+                    log.warning(f"Could not shut down the {name} cleanly: {result}")
+            _PW = None
+            _BROWSER = None
+
 
 class WebScraper:
     """
@@ -32,31 +153,69 @@ class WebScraper:
     - get_reviews(): Scrapes all reviews including pagination handling
     """
 
-    def __init__(self, url):
-        """Constructor for our scraper. Setting up all the basic things here."""
+    def __init__(self, url, browser=None):
+        """
+        Constructor for our scraper. Setting up all the basic things here.
+        Every scraper only opens its own context, in a browser passed in by the caller
+        or else in the browser shared by the whole process.
+        """
         self.url = url
-        self.playwright = None
-        self.browser = None
+        self.browser = browser
+        # Only the process-wide browser is released on close, a passed in one belongs to the caller.
+        self._uses_shared_browser = browser is None
+        self.context = None
         self.page = None
+        self.user_agent = None
+        # Locators of self.page, built once per selector string, see _locator().
+        self._locators = {}
         self.logger = logging.getLogger(__name__)
         # To make sure we only start playwright once.
         self._initialized = False
-        self.parser = DataParser()
+        self._closed = False
 
     async def _initialize(self):
         """
-        Start up Playwright and spin up a browser.
+        Get hold of the shared browser, unless one was passed in,
+        then open our own context and page in it.
         """
         if not self._initialized:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(headless=HEADLESS_MODE)
-            # We need to act like a real user, so a random user agent is picked.
-            page = await self.browser.new_page(user_agent=random.choice(USER_AGENTS))
+            if self._uses_shared_browser:
+                self.browser = await _acquire_shared_browser()
+            # If an earlier scrape already got past Cloudflare, we start with its cookies.
+            storage_state = _load_storage_state()
+            try:
+                self.context = await self._new_context(storage_state)
+            except Exception as e:
+                log.warning(f"Could not reuse the saved browser storage state, starting fresh: {e}")
+                _discard_storage_state()
+                self.context = await self._new_context(None)
             # Use playwright stealth to make it more robust against known blockers.
-            await Stealth().apply_stealth_async(page)
-            self.page = page
+            # Both are set on the context, so the review page pool is covered as well.
+            await self.context.add_init_script(STEALTH_JS)
+            await self.context.add_init_script(DISMISS_OVERLAYS_JS)
+            await self.context.route("**/*", _block_unneeded_requests)
+            self.page = await self.context.new_page()
             self._initialized = True
 
+    async def _new_context(self, storage_state):
+        """
+        Opens a context with the given storage state. Cloudflare ties its clearance cookie
+        to the user agent, so the one saved with the state is reused. Without a state we
+        need to act like a real user, so a random user agent is picked.
+        """
+        if storage_state is not None:
+            self.user_agent = storage_state.pop('user_agent', None) or random.choice(USER_AGENTS)
+        else:
+            self.user_agent = random.choice(USER_AGENTS)
+        return await self.browser.new_context(user_agent=self.user_agent, storage_state=storage_state)
+
+    def _locator(self, selector):
+        """Returns the locator for a selector on our page, reusing it if it was built before."""
+        locator = self._locators.get(selector)
+        if locator is None:
+            locator = self._locators[selector] = self.page.locator(selector)
+        return locator
+
     async def _execute_with_retries(self, action, action_name=""):
         """
         Sometimes the connection is not good or the page is slow.
@@ -69,7 +228,8 @@ class WebScraper:
             except PlaywrightTimeoutError:
                 # A timeout happened. Maybe network/page issues. Wait and try again.
                 log.debug(f"Attempt {attempt + 1} failed for '{action_name}'. Retrying...")
-                await asyncio.sleep(RETRY_DELAY_SECONDS)
+                if attempt + 1 < RETRY_COUNT:
+                    await asyncio.sleep(_retry_delay(attempt))
             except Exception as e:
                 # Some other unexpected issue. Stop after the retry count is exceeded.
                 log.error(f"An unexpected error occurred during '{action_name}': {e}")
@@ -81,9 +241,9 @@ class WebScraper:
         """Navigates to the product page with retry logic to bypass cloudflare checks."""
         async def navigate():
             log.info("Navigating to page... This may take a moment due to Cloudflare checks.")
-            # We tell it to wait until the page structure is ready.
-            await self.page.goto(self.url, wait_until='domcontentloaded', timeout=90000)
-            # Just to be sure, we wait for the product title to actually appear on the screen.
+            # We only wait for the navigation to commit, the DOM keeps streaming in after that.
+            await self.page.goto(self.url, wait_until='commit', timeout=30000)
+            # The product title actually appearing on the screen is all we need to get started.
             await self.page.wait_for_selector(SELECTORS['product']['title'], state='visible', timeout=45000)
             log.debug('Selector wait finished')
             return True
@@ -91,13 +251,32 @@ class WebScraper:
         # We use our retry wrapper to make sure the navigation is successful.
         if await self._execute_with_retries(navigate, "Navigate to page"):
             log.info("Successfully navigated to page and bypassed Cloudflare.")
+            await self._save_storage_state()
             return True
         return False
 
+    async def _save_storage_state(self):
+        """Saves our cookies and local storage, so later contexts can skip the Cloudflare check."""
+        tmp_path = None
+        try:
+            state = await self.context.storage_state()
+            # The clearance cookie is only good with the user agent that earned it, see _new_context().
+            state['user_agent'] = self.user_agent
+            # Written to a temp file and moved into place, as several scrapers may save at once.
+            state_dir = os.path.dirname(os.path.abspath(STORAGE_STATE_PATH))
+            with tempfile.NamedTemporaryFile('w', dir=state_dir, suffix='.tmp', delete=False) as tmp_file:
+                tmp_path = tmp_file.name
+                json.dump(state, tmp_file)
+            os.replace(tmp_path, STORAGE_STATE_PATH)
+        except Exception as e:
+            log.warning(f"Could not save the browser storage state: {e}")
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
     async def get_product_info(self):
         """Orchestrates the extraction of product information."""
         await self._initialize()
-        return await self.parser.extract_product_info(self.page)
+        return await _PARSER.extract_product_info(self.page)
 
     async def get_reviews(self):
         """Extracts all reviews, handling pagination and dynamic content."""
@@ -107,58 +286,160 @@ class WebScraper:
             log.info("Navigating to reviews tab...")
             # First, we find and click the 'Reviews' link to show them.
             await self._execute_with_retries(
-                lambda: self.page.locator(SELECTORS['product']['reviews_link']).click(),
+                lambda: self._locator(SELECTORS['product']['reviews_link']).click(),
                 "Click Reviews Tab"
             )
-            # Wait for the review container to load up.
-            await self.page.wait_for_selector(SELECTORS['reviews']['container'], timeout=90000)
+            # Wait for the reviews themselves to load up, instead of for the page to settle.
+            if not await self._wait_for_reviews(self.page):
+                log.info("No reviews found on the reviews tab.")
+                return reviews_list
+            # The pagination block may render after the reviews, a product with one page has none.
+            try:
+                await self.page.wait_for_selector(SELECTORS['reviews']['pagination_buttons'], timeout=5000)
+            except PlaywrightTimeoutError:
+                log.debug("No pagination found, the reviews fit on one page.")
 
-            current_page = 1
-            # We will keep going page by page until there are no more pages left.
-            while True:
+            total_pages = await self._count_review_pages()
+            if REVIEW_PAGE_POOL_SIZE > 1 and total_pages > 1:
+                # Page 1 is already open here, the remaining pages are fetched in parallel.
+                reviews_list.extend(await _PARSER.extract_all_reviews(self.page))
+                reviews_list.extend(await self._get_remaining_review_pages(total_pages))
+                return reviews_list
+
+            # We go page by page, up to the last page number read from the pagination above.
+            for current_page in range(1, total_pages + 1):
                 log.debug(f"Scraping reviews from page {current_page}...")
-                await asyncio.sleep(random.uniform(1, 2)) # A small, random pause.
-                # On each page, we find all the individual review items.
-                review_items = await self.page.locator(SELECTORS['reviews']['review_item']).all()
-                if not review_items:
+                # On each page, we read all the individual review items in a single call.
+                parsed_reviews_on_page = await _PARSER.extract_all_reviews(self.page)
+                if not parsed_reviews_on_page:
                     # If no reviews are there, we are done, so we can stop.
                     log.info(f"No reviews found on page {current_page}. Ending scrape.")
                     break
 
-                # We will use asyncio to parse all the reviews on the page at the same time.
-                parse_tasks = [self.parser.parse_review(item) for item in review_items]
-                parsed_reviews_on_page = await asyncio.gather(*parse_tasks)
-                # After parsing, we add non-empty reviews to our main list.
-                reviews_list.extend([review for review in parsed_reviews_on_page if review])
-
-                # Now, we look for the next page button.
-                next_page_num = current_page + 1
-                next_page_locator = self.page.locator(f'ol.paginations a.button:text-is("{next_page_num}")')
-
-                if await next_page_locator.is_visible():
-                    print(f"Navigating to page {next_page_num}...")
-                    # Trick to remove random overlays.
-                    await self.page.locator('body').click(position={'x': 5, 'y': 5})
+                # After parsing, we add the reviews to our main list. The page script always
+                # returns a dict per review item (missing fields are empty), so nothing to filter.
+                reviews_list.extend(parsed_reviews_on_page)
 
-                    # Click the next page button to load more reviews.
-                    await next_page_locator.click()
-
-                    # And we update our page number count.
-                    current_page = next_page_num
-                    
-                else:
-                    # If no next page button, it means we are at the last page.
+                if current_page == total_pages:
                     log.info("Last page of reviews reached.")
                     break
 
+                next_page_num = current_page + 1
+                log.debug(f"Navigating to page {next_page_num}...")
+                # No need to clear overlays first, DISMISS_OVERLAYS_JS closes them as they show up.
+                if not await self._execute_with_retries(
+                    lambda: self._go_to_review_page(next_page_num, parsed_reviews_on_page[0]),
+                    f"Go to review page {next_page_num}"
+                ):
+                    log.warning(f"Could not open review page {next_page_num} of {total_pages}, keeping the reviews scraped so far.")
+                    break
+
         except Exception as e:
             log.error(f"A critical error occurred while extracting reviews: {e}")
         return reviews_list
 
+    async def _go_to_review_page(self, page_number, first_review):
+        """
+        Clicks the pagination button of a page of reviews, and instead of a fixed pause waits
+        just until its reviews replaced the current ones, i.e. the first review is a different one.
+        """
+        pagination_buttons = SELECTORS['reviews']['pagination_buttons']
+        await self.page.locator(f'{pagination_buttons}:text-is("{page_number}")').click()
+        await self.page.wait_for_function(
+            _REVIEWS_CHANGED_JS,
+            arg=[SELECTORS['reviews'], first_review['reviewer_name'], first_review['review_body']],
+            timeout=10000
+        )
+        return True
+
+    @staticmethod
+    async def _wait_for_reviews(page):
+        """
+        Waits for the review container and then for the first review item in it,
+        as the list renders after the container. Returns False if the product has no reviews.
+        """
+        await page.wait_for_selector(SELECTORS['reviews']['container'], timeout=90000)
+        try:
+            await page.wait_for_selector(SELECTORS['reviews']['review_item'], timeout=10000)
+        except PlaywrightTimeoutError:
+            return False
+        return True
+
+    async def _count_review_pages(self):
+        """Reads the highest page number from the pagination block, 1 if there is none."""
+        return await self.page.eval_on_selector_all(
+            SELECTORS['reviews']['pagination_buttons'],
+            "els => Math.max(1, ...els.map(e => parseInt(e.innerText) || 1))"
+        )
+
+    def _review_page_url(self, page_number):
+        """Builds the URL of one page of reviews, using the PageNumber query parameter."""
+        parts = urlsplit(self.url)
+        query = dict(parse_qsl(parts.query))
+        query['PageNumber'] = page_number
+        return urlunsplit(parts._replace(query=urlencode(query)))
+
+    async def _get_remaining_review_pages(self, total_pages):
+        """Scrapes review pages 2 to total_pages at the same time, using a pool of pages."""
+        pool_size = min(REVIEW_PAGE_POOL_SIZE, total_pages - 1)
+        pool = PlaywrightPagePool(self.context, pool_size)
+        urls = [self._review_page_url(page_number) for page_number in range(2, total_pages + 1)]
+        reviews_per_page = [[] for _ in urls]
+        pending = iter(enumerate(urls))
+
+        async def worker():
+            # Each worker picks the next URL as soon as it's done with one, so there are only
+            # ever pool_size tasks, instead of one task per review page waiting for a free page.
+            for index, url in pending:
+                reviews_per_page[index] = await self._scrape_review_page(url, pool)
+
+        try:
+            await asyncio.gather(*[worker() for _ in range(pool_size)])
+        finally:
+            await pool.close()
+        return [review for reviews in reviews_per_page for review in reviews]
+
+    async def _scrape_review_page(self, url, pool):
+        """Opens one page of reviews on a page borrowed from the pool and extracts its reviews."""
+        page = None
+        try:
+            page = await pool.acquire()
+            await asyncio.sleep(random.uniform(1, 2))  # A small, random pause, so we don't look like a bot.
+
+            async def load_reviews():
+                await page.goto(url, wait_until='commit', timeout=30000)
+                await page.locator(SELECTORS['product']['reviews_link']).click()
+                if not await self._wait_for_reviews(page):
+                    # Only pages that exist are fetched here, so an empty one just didn't render in time.
+                    raise PlaywrightTimeoutError(f"No reviews rendered on {url}")
+                return await _PARSER.extract_all_reviews(page)
+
+            # Same retries and backoff as the pages clicked through one by one.
+            reviews = await self._execute_with_retries(load_reviews, f"Scrape reviews on {url}")
+            if reviews is None:
+                log.warning(f"Could not scrape the reviews on {url}, skipping that page.")
+                return []
+            return reviews
+        except Exception as e:
+            log.warning(f"Could not scrape the reviews on {url}: {e}")
+            return []
+        finally:
+            if page is not None:
+                pool.release(page)
+
     async def close(self):
-        """This will shut down the browser and Playwright after execution"""
-        log.info("Closing browser.")
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
\ No newline at end of file
+        """
+        Closes our context, and lets go of the shared browser so the last scraper shuts it down.
+        Safe to call more than once.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if self.context:
+                await self.context.close()
+        finally:
+            # Even if the context is already gone (e.g. the browser crashed), our reference
+            # has to be given back, or the shared browser is never shut down.
+            if self._uses_shared_browser and self.browser is not None:
+                await _release_shared_browser()
\ No newline at end of file